@@ -6,6 +6,11 @@ from flask import Flask, render_template, request, jsonify
 import datetime
 import memory
 import task_agent
+import scheduler
+import persistence
+import message_store
+import prewarm
+import transcription
 
 
 app = Flask(__name__)
@@ -67,17 +72,14 @@ class ConversationHistory:
         return self.turns
 
     def save_to_json(self, filename):
-        with open(filename, 'w') as f:
-            json.dump(self.turns, f, indent=2)
+        message_store.save_messages(filename, self.turns)
 
 
 
 conversation_history = ConversationHistory()
 # KISS: Load existing conversation.json if present
 if os.path.exists('conversation.json'):
-    with open('conversation.json', 'r') as f:
-        turns = json.load(f)
-        conversation_history.turns = turns
+    conversation_history.turns = message_store.load_messages('conversation.json')
 
         
 try:
@@ -87,53 +89,66 @@ except FileNotFoundError:
     print("Error: system.txt not found. Please create a file named system.txt with the system prompt and book content.")
     exit()
 
-# Dictionary to hold the variable values
-variables = {}
+def render_system_message():
+    """Fill system.txt with the current date, plan, status report and tasks"""
+    # Dictionary to hold the variable values
+    variables = {}
 
-# Get the current date
-variables['date'] = datetime.datetime.now().strftime("%Y-%m-%d")
+    # Get the current date
+    variables['date'] = datetime.datetime.now().strftime("%Y-%m-%d")
 
-# Read the content of plan.txt
-try:
-    with open("plan.txt", "r", encoding="utf-8") as f:
-        variables['plan'] = f.read()
-except FileNotFoundError:
-    print("Warning: plan.txt not found. Using empty string for plan.")
-    variables['plan'] = ""
-
-# Read the content of status_report.txt
-try:
-    with open("status_report.txt", "r", encoding="utf-8") as f:
-        variables['status_report'] = f.read()
-except FileNotFoundError:
-    print("Warning: status_report.txt not found. Using empty string for status_report.")
-    variables['status_report'] = ""
+    # Read the content of plan.txt
+    try:
+        with open("plan.txt", "r", encoding="utf-8") as f:
+            variables['plan'] = f.read()
+    except FileNotFoundError:
+        print("Warning: plan.txt not found. Using empty string for plan.")
+        variables['plan'] = ""
+
+    # Read the content of status_report.txt (may still be staged in persistence)
+    variables['status_report'] = persistence.load_text("status_report.txt")
+    if variables['status_report'] is None:
+        print("Warning: status_report.txt not found. Using empty string for status_report.")
+        variables['status_report'] = ""
 
-try:
-    with open("memory.json", "r", encoding="utf-8") as f:
-        data = json.load(f)  # Load the entire JSON content into a Python dictionary
+    try:
+        data = persistence.load_json("memory.json")  # Load the entire JSON content into a Python dictionary
 
-        if "active_tasks" in data:
+        if data is None:
+            print("Warning: memory.json not found. Using empty list for memory.")
+            variables['memory'] = [] # Initialize as empty list if file not found
+        elif "active_tasks" in data:
             variables['memory'] = data["active_tasks"]  # Extract only the 'active_tasks' list and store in 'memory'
         else:
             print("Warning: 'active_tasks' key not found in memory.json. Using empty list for memory.")
             variables['memory'] = [] # Initialize as empty list if key is missing
-except FileNotFoundError:
-    print("Warning: memory.json not found. Using empty list for memory.")
-    variables['memory'] = [] # Initialize as empty list if file not found
-except json.JSONDecodeError:
-    print("Warning: memory.json is not valid JSON. Using empty list for memory.")
-    variables['memory'] = [] # Initialize as empty list if JSON is invalid
-except KeyError as e: # Catch any other unexpected KeyErrors during JSON processing
-    print(f"Warning: KeyError accessing JSON data: {e}. Using empty list for memory.")
-    variables['memory'] = [] # Initialize as empty list if KeyError
+    except json.JSONDecodeError:
+        print("Warning: memory.json is not valid JSON. Using empty list for memory.")
+        variables['memory'] = [] # Initialize as empty list if JSON is invalid
+    except KeyError as e: # Catch any other unexpected KeyErrors during JSON processing
+        print(f"Warning: KeyError accessing JSON data: {e}. Using empty list for memory.")
+        variables['memory'] = [] # Initialize as empty list if KeyError
 
+    # Format the system message with the variables
+    rendered = sys_message.format(**variables)
+    return f"<file_contents> {rendered} </file_contents>"
 
-# Format the system message with the variables
-system_message = sys_message.format(**variables)
-system_message = f"<file_contents> {system_message} </file_contents>"
+
+system_message = render_system_message()
 
 MODEL_NAME = "claude-3-5-sonnet-20241022"  
+prewarmer = prewarm.Prewarmer(client, MODEL_NAME)
+transcriber = transcription.Transcriber()
+
+
+def refresh_system_message():
+    """Re-render the system prompt and warm the cache for it if it changed"""
+    global system_message
+    rendered = render_system_message()
+    if rendered != system_message:
+        system_message = rendered
+        prewarmer.request_warm(system_message)
+
 
 def chat():
     turn_count = 1
@@ -196,29 +211,21 @@ def manage_conversation_history():
     # Check if we have more than 75 messages
     if len(turns) > 75:
         # Load or create conversation_archive.json
-        archive_path = 'conversation_archive.json'
-        if os.path.exists(archive_path):
-            with open(archive_path, 'r') as f:
-                archive = json.load(f)
-        else:
-            archive = []
+        archive_path = memory.ARCHIVE_FILE
         
         # Move excess messages to archive (keeping the last 50 in the main conversation)
         messages_to_archive = turns[:len(turns) - 50]
-        archive.extend(messages_to_archive)
         
         # Update conversation history
         conversation_history.turns = turns[len(turns) - 50:]
         
-        # Save updated archive
-        with open(archive_path, 'w') as f:
-            json.dump(archive, f, indent=2)
-        
+        with memory.archive_lock:
+            message_store.append_messages(archive_path, messages_to_archive)
 
         # Trigger contextualization
         try:
             task_agent.process_archived_messages(messages_to_archive)
-            memory.contextualize(archive)
+            memory.summarize_archive()
         except Exception as e:
             print(f"Warning: Failed to contextualize archive: {e}")
         
@@ -237,23 +244,31 @@ def api_chat():
     
     start_time = time.time()
     
-    response = client.messages.create(
-        model=MODEL_NAME,
-        extra_headers={
-            "anthropic-beta": "prompt-caching-2024-07-31"
-        },
-        max_tokens=8000,
-        system=[
-            {
-                "type": "text",
-                "text": system_message,
-                "cache_control": {"type": "ephemeral"}
+    response = None
+    # The scheduler can swap system_message mid-request; report the prompt that was actually sent
+    prompt = system_message
+    prewarmer.live_started()
+    scheduler.live_started()
+    try:
+        response = client.messages.create(
+            model=MODEL_NAME,
+            extra_headers={
+                "anthropic-beta": "prompt-caching-2024-07-31"
             },
-        ],
-        messages=conversation_history.get_turns(),
-    )
-    
-    end_time = time.time()
+            max_tokens=8000,
+            system=[
+                {
+                    "type": "text",
+                    "text": prompt,
+                    "cache_control": {"type": "ephemeral"}
+                },
+            ],
+            messages=conversation_history.get_turns(),
+        )
+    finally:
+        end_time = time.time()
+        scheduler.live_finished()
+        prewarmer.live_finished(prompt, end_time - start_time, response.usage if response else None)
     
     assistant_reply = response.content[0].text
     conversation_history.add_turn_assistant(assistant_reply)
@@ -289,6 +304,9 @@ def clear_history():
         memory.on_new_chat()
     except Exception as e:
         print(f"Warning: Failed to process new chat in memory/executive modules: {e}")
+
+    # A new chat is where status report/task changes get picked up
+    refresh_system_message()
     
     return jsonify({"status": "success"})
 
@@ -300,6 +318,8 @@ def save_chat():
         os.makedirs('chats')
     filename = f"chats/{chat_name}.json"
     conversation_history.save_to_json(filename)
+    # Write it now so it shows up in list_chats straight away
+    persistence.flush()
     current_chat_file = filename
     return jsonify({"status": "success", "filename": filename})
 
@@ -307,12 +327,40 @@ def save_chat():
 def load_chat():
     global conversation_history
     filename = request.json['filename']
-    with open(filename, 'r') as f:
-        turns = json.load(f)
+    turns = message_store.load_messages(filename)
     conversation_history = ConversationHistory()
     conversation_history.turns = turns
     return jsonify({"status": "success", "history": conversation_history.get_full_history()})
 
+@app.route('/api/briefing', methods=['GET'])
+def briefing():
+    # Precomputed off-peak by the scheduler; only fall back to computing it here
+    briefing_text = scheduler.read_briefing()
+    if briefing_text is None:
+        briefing_text = task_agent.TaskManager().generate_morning_briefing()
+    return jsonify({"briefing": briefing_text})
+
+@app.route('/api/transcribe', methods=['POST'])
+def transcribe():
+    # One recording segment per request; the last one (final=1) returns the whole transcript
+    try:
+        session_id = request.form['session']
+        index = int(request.form['index'])
+        audio = request.files['file']
+    except (KeyError, ValueError):
+        return jsonify({"error": "Expected session, integer index and file fields"}), 400
+    if index < 0:
+        return jsonify({"error": "Segment index must not be negative"}), 400
+    final = request.form.get('final') == '1'
+    transcriber.add_chunk(session_id, index, audio.read(), audio.filename, audio.mimetype, final)
+    if not final:
+        return jsonify({"status": "accepted"})
+    text, errors = transcriber.finish(session_id)
+    if errors:
+        # A partial transcript would silently drop part of what was said
+        return jsonify({"error": "Transcription incomplete: " + "; ".join(errors), "text": text}), 502
+    return jsonify({"text": text})
+
 @app.route('/api/list_chats', methods=['GET'])
 def list_chats():
     if not os.path.exists('chats'):
@@ -327,7 +375,18 @@ def list_chats():
 
 if __name__ == '__main__':
     try:
+        message_store.migrate()
         memory.initialize()
+        # The server process renders the prompt from disk; don't let it miss the new summaries
+        persistence.flush()
     except Exception as e:
         print(f"Warning: Failed to initialize memory/executive modules: {e}")
-    app.run(debug=True)
\ No newline at end of file
+    # The debug reloader runs this block in a watcher process too; only schedule in the server
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        scheduler.listeners.append(refresh_system_message)
+        scheduler.start()
+        prewarmer.request_warm(system_message)
+    try:
+        app.run(debug=True)
+    finally:
+        persistence.flush()
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Precision/recall and throughput of TaskIndex on a synthetic task corpus.
+
+Indexes a set of distinct tasks, then queries with paraphrases of them
+(should match) and with hard negatives that must not match:
+  - same object, different verb   ("review grant proposal" vs "write grant proposal")
+  - same verb, different person/place/number in the object
+                                   ("email John about the report" vs "email Sarah ...")
+  - same verb, a different object sharing the slot
+                                   ("book hotel in berlin" vs "book flight to berlin")
+plus a fixed list of known tricky pairs.
+
+Paraphrases using verbs outside TaskIndex's synonym table ("wrap up",
+"look over", "mail", ...) are scored separately as out-of-vocabulary
+recall; the table was tuned on VERBS, so only that column says how often
+real rewording by the model is caught.
+
+    python bench_task_index.py [--tasks 100] [--seed 0]
+"""
+import time
+import random
+import argparse
+from task_index import TaskIndex
+
+VERBS = {
+    "finish": ["complete", "finalize", "finishing", "finish"],
+    "write": ["draft", "writing", "write"],
+    "review": ["reviewing", "review", "go over"],
+    "call": ["phone", "ring", "calling"],
+    "book": ["schedule", "reserve", "booking"],
+    "fix": ["repair", "fixing", "fix"],
+    "send": ["sending", "send"],
+    "prepare": ["prep", "preparing", "prepare"],
+    "cancel": ["cancel", "cancelling"],
+    "email": ["email", "emailing"],
+}
+# Rewordings the synonym table doesn't know; kept out of VERBS so they aren't tuned against
+OOV_VERBS = {
+    "finish": ["wrap up"],
+    "write": ["write up"],
+    "review": ["check", "look over"],
+    "fix": ["sort out"],
+    "send": ["email", "mail"],
+    "prepare": ["get ready"],
+}
+# Templates sharing a slot type are used to build "different object, same slot" negatives
+OBJECTS = {
+    "n": [
+        "thesis chapter {n}", "invoice for client {n}", "lab report {n}", "sprint {n} retrospective",
+        "pull request {n}", "chapter {n} exercises", "podcast episode {n} outline",
+        "paper figures for section {n}",
+    ],
+    "person": [
+        "{person} about the report", "{person} about the budget", "birthday gift for {person}",
+        "meeting with {person}", "{person} re contract renewal", "feedback for {person}",
+    ],
+    "city": [
+        "flight to {city}", "hotel in {city}", "train tickets to {city}", "conference talk in {city}",
+    ],
+    "": [
+        "dentist appointment", "quarterly tax return", "grant proposal", "slides for the team meeting",
+        "bike brakes", "reading list", "apartment lease renewal", "conference abstract",
+        "budget spreadsheet", "car insurance renewal", "blog post draft", "weekly review notes",
+        "server backup script", "kitchen sink leak", "gym membership", "literature review",
+        "job application cover letter", "unit tests for parser module", "passport renewal form",
+        "newsletter for march", "onboarding checklist", "photo backup to external drive",
+        "team offsite agenda", "vaccination appointment", "website contact form", "wedding rsvp",
+        "laptop battery replacement", "garden watering plan", "library books return",
+    ],
+}
+FILLS = {
+    "n": [str(i) for i in range(1, 21)],
+    "person": ["john", "sarah", "priya", "marco", "lena", "tom", "aisha", "david"],
+    "city": ["berlin", "paris", "lisbon", "tokyo", "boston", "madrid"],
+    "": [""],
+}
+FILLERS = ["", "", "asap", "this week", "by friday", "before monday", "today"]
+
+# (indexed, query, should_match)
+KNOWN_PAIRS = [
+    ("Book hotel in Berlin", "Book flight to Berlin", False),
+    ("Review grant proposal", "Write grant proposal", False),
+    ("Email John about the report", "Email Sarah about the report", False),
+    ("Cancel dentist appointment", "Schedule dentist appointment", False),
+    ("Finish thesis chapter 3", "Finish thesis chapter 4", False),
+    ("Finish thesis chapter 3", "complete the thesis chapter 3 asap", True),
+    ("Book dentist appointment", "schedule a dentist appointment this week", True),
+    ("Email John about the report", "email john about the reports", True),
+    ("Review pull request 12345", "Review pull request 12346", False),
+    ("Pay invoice 10023", "Pay invoice 10024", False),
+    ("Email Maria about the budget", "Email Marie about the budget", False),
+    ("Call Daniel", "Call Daniela", False),
+    ("Move meeting to March", "Move meeting to match", False),
+    ("Write literature review", "write literatue review", True),
+]
+
+
+def fill(slot, template, value):
+    return template.format(**{slot: value}) if slot else template
+
+
+def render(verb, obj, rng, paraphrase=False, verbs=VERBS):
+    words = obj.split()
+    if paraphrase:
+        verb = rng.choice(verbs[verb])
+        if rng.random() < 0.3 and len(words) > 2:
+            # light reordering, e.g. "thesis chapter 3" -> "chapter 3 thesis"
+            words = words[1:] + words[:1]
+        if rng.random() < 0.3:
+            i = rng.randrange(len(words))
+            w = words[i]
+            if len(w) > 5:
+                j = rng.randrange(1, len(w) - 1)
+                words[i] = w[:j] + w[j + 1:]
+    filler = rng.choice(FILLERS) if paraphrase else ""
+    text = f"{verb} {' '.join(words)} {filler}".strip()
+    return text.capitalize() if rng.random() < 0.5 else text
+
+
+def build_corpus(n_tasks, rng):
+    """Distinct indexed tasks and, for each, hard negatives that share a verb or an object"""
+    indexed = []
+    seen = set()
+    attempts = 0
+    while len(indexed) < n_tasks and attempts < n_tasks * 100:
+        attempts += 1
+        slot = rng.choice(list(OBJECTS))
+        template = rng.choice(OBJECTS[slot])
+        value = rng.choice(FILLS[slot])
+        obj = fill(slot, template, value)
+        if obj in seen:
+            continue
+        seen.add(obj)
+        indexed.append((rng.choice(list(VERBS)), slot, template, value))
+
+    indexed_keys = {(verb, fill(slot, template, value)) for verb, slot, template, value in indexed}
+    negatives = []
+    for verb, slot, template, value in indexed:
+        obj = fill(slot, template, value)
+        other_verb = rng.choice([v for v in VERBS if v != verb])
+        candidates = [(other_verb, obj)]
+        if slot:
+            other_value = rng.choice([v for v in FILLS[slot] if v != value])
+            candidates.append((verb, fill(slot, template, other_value)))
+            other_template = rng.choice([t for t in OBJECTS[slot] if t != template])
+            candidates.append((verb, fill(slot, other_template, value)))
+        negatives += [c for c in candidates if c not in indexed_keys]
+    return [(verb, fill(slot, template, value)) for verb, slot, template, value in indexed], negatives
+
+
+def score(index, queries):
+    """(true merges, wrong merges, missed duplicates) over (text, expected task id or None) queries"""
+    tp = fp = fn = 0
+    for text, expected in queries:
+        found = index.find_duplicate(text)
+        found = found[0] if found else None
+        if found is not None and found == expected:
+            tp += 1
+        elif found is not None:
+            fp += 1
+            if expected is not None:
+                fn += 1
+        elif expected is not None:
+            fn += 1
+    return tp, fp, fn
+
+
+def evaluate(threshold, indexed, negatives, rng, paraphrases=5):
+    index = TaskIndex(threshold=threshold)
+    start = time.perf_counter()
+    for i, (verb, obj) in enumerate(indexed):
+        index.add(str(i), render(verb, obj, rng))
+    add_time = time.perf_counter() - start
+
+    queries = []
+    for i, (verb, obj) in enumerate(indexed):
+        for _ in range(paraphrases):
+            queries.append((render(verb, obj, rng, paraphrase=True), str(i)))
+    for verb, obj in negatives:
+        queries.append((render(verb, obj, rng, paraphrase=True), None))
+    oov_queries = [(render(verb, obj, rng, paraphrase=True, verbs=OOV_VERBS), str(i))
+                   for i, (verb, obj) in enumerate(indexed) if verb in OOV_VERBS]
+
+    start = time.perf_counter()
+    tp, fp, fn = score(index, queries)
+    query_time = time.perf_counter() - start
+    oov_tp, oov_fp, oov_fn = score(index, oov_queries)
+
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    return {
+        "precision": precision,
+        "recall": recall,
+        "oov_recall": oov_tp / (oov_tp + oov_fn) if oov_tp + oov_fn else 1.0,
+        "false_merges": fp + oov_fp,
+        "adds_per_sec": len(indexed) / add_time if add_time else float("inf"),
+        "queries_per_sec": len(queries) / query_time if query_time else float("inf"),
+    }
+
+
+def check_known_pairs(threshold):
+    wrong = []
+    for existing, query, should_match in KNOWN_PAIRS:
+        index = TaskIndex(threshold=threshold)
+        index.add("existing", existing)
+        if (index.find_duplicate(query) is not None) != should_match:
+            wrong.append((existing, query))
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100, help="distinct tasks to index")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    indexed, negatives = build_corpus(args.tasks, rng)
+    print(f"{len(indexed)} indexed tasks, {len(negatives)} hard negatives, {len(KNOWN_PAIRS)} known pairs")
+    print(f"{'threshold':>9} {'precision':>9} {'recall':>7} {'oov recall':>10} {'false merges':>12} "
+          f"{'known wrong':>11} {'adds/s':>9} {'queries/s':>10}")
+    for threshold in (0.3, 0.4, 0.5, 0.6, 0.7, 0.8):
+        r = evaluate(threshold, indexed, negatives, random.Random(args.seed))
+        wrong = check_known_pairs(threshold)
+        print(f"{threshold:>9.1f} {r['precision']:>9.3f} {r['recall']:>7.3f} {r['oov_recall']:>10.3f} "
+              f"{r['false_merges']:>12} {len(wrong):>11} {r['adds_per_sec']:>9.0f} {r['queries_per_sec']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
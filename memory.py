@@ -1,12 +1,21 @@
 import os
-import json
 import shutil
+import threading
 from anthropic import Anthropic
 import datetime
+import persistence
+import message_store
 
 client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
 MODEL = "claude-3-5-sonnet-20241022"
 
+ARCHIVE_FILE = "conversation_archive.json"
+
+# Guards reads and writes of ARCHIVE_FILE; never held across a model call
+archive_lock = threading.RLock()
+# One archive summary at a time; others skip rather than wait (see summarize_archive)
+_summarizing = threading.Lock()
+
 def check_long_term_memory():
     if not os.path.exists("archive_status.txt"):
         return
@@ -56,10 +65,11 @@ limit response to 1500 words, prioritizing both depth and breadth.
     summary_text = response.content[0].text
     
     # Overwrite lt_memory with the new summary
-    with open("lt_memory.txt", "w") as f:  # Use 'w' mode to overwrite
-        f.write(f"\n--- Long Term Memory Summary {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')} ---\n")
-        f.write(summary_text)
-        f.write("\n")
+    persistence.save_text(
+        "lt_memory.txt",
+        f"\n--- Long Term Memory Summary {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')} ---\n"
+        + summary_text + "\n"
+    )
     
     # Mark block in archive
     with open("archive_status.txt", "a") as f:
@@ -68,11 +78,10 @@ limit response to 1500 words, prioritizing both depth and breadth.
 
 def manage_status_report():
     """Manage status report size by archiving old entries"""
-    if not os.path.exists("status_report.txt"):
+    if not persistence.exists("status_report.txt"):
         return
         
-    with open("status_report.txt", "r") as f:
-        lines = f.readlines()
+    lines = persistence.load_text("status_report.txt").splitlines(keepends=True)
         
     if len(lines) > 100:
         # Archive first 10 lines
@@ -80,16 +89,14 @@ def manage_status_report():
             archive.writelines(lines[:10])
             
         # Keep the rest in status_report
-        with open("status_report.txt", "w") as f:
-            f.writelines(lines[10:])
+        persistence.save_text("status_report.txt", "".join(lines[10:]))
         
         # Check if we need to summarize the archive
         check_long_term_memory()
 
 def process_chat_file(filepath):
     # Read chat content
-    with open(filepath, 'r') as f:
-        chat_data = json.load(f)
+    chat_data = message_store.load_messages(filepath)
     
     # Construct chat history text
     chat_text = ""
@@ -132,10 +139,10 @@ write around 1-5 bullet points for shorter conversations, and more for longer on
     manage_status_report()
 
     # Append to status report
-    with open("status_report.txt", "a") as f:
-        f.write(f"\n--- Summary from {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')} ---\n")
-        f.write(summary)
-        f.write("\n")
+    persistence.append_text(
+        "status_report.txt",
+        f"\n--- Summary from {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')} ---\n" + summary + "\n"
+    )
 
     # Move file to archive
     archive_dir = "MEMORY_ARCHIVE"
@@ -213,25 +220,54 @@ write around 3-5 points for shorter conversations, and more for longer ones.
     summary = response.content[0].text
 
     # Append to status report
-    with open("status_report.txt", "a") as f:
-        f.write(f"\n--- Archived Summary from {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')} ---\n")
-        f.write(summary)
-        f.write("\n")
-
-    # Append to total_archive.json
-    if os.path.exists("total_archive.json"):
-        with open("total_archive.json", "r") as f:
-            total_archive = json.load(f)
-    else:
-        total_archive = []
-    
-    total_archive.extend(archived_messages)
-    
-    with open("total_archive.json", "w") as f:
-        json.dump(total_archive, f, indent=2)
+    persistence.append_text(
+        "status_report.txt",
+        f"\n--- Archived Summary from {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')} ---\n" + summary + "\n"
+    )
+
+    # Append to total_archive.json (ids only, the messages are already in the store)
+    message_store.append_messages("total_archive.json", archived_messages)
+
+    # Drop the summarized turns from the archive; anything appended meanwhile stays for the next run
+    with archive_lock:
+        remaining = message_store.load_messages(ARCHIVE_FILE, [])[len(archived_messages):]
+        if remaining:
+            message_store.save_messages(ARCHIVE_FILE, remaining)
+        elif persistence.exists(ARCHIVE_FILE):
+            persistence.remove(ARCHIVE_FILE)
 
-    # Clear conversation_archive.json
-    if os.path.exists("conversation_archive.json"):
-        os.remove("conversation_archive.json")
+    print("Contextualization complete")
 
-    print("Contextualization complete")
\ No newline at end of file
+
+def summarize_archive():
+    """
+    Contextualize the turns in conversation_archive.json.
+
+    If a summary is already running (the daily digest or a chat request),
+    returns False straight away instead of waiting for its model call; the
+    turns stay archived and are picked up by the next run.
+    """
+    if not _summarizing.acquire(blocking=False):
+        print("Archive summary already running; leaving the new turns for the next one")
+        return False
+    try:
+        with archive_lock:
+            pending = message_store.load_messages(ARCHIVE_FILE, [])
+        if pending:
+            contextualize(pending)
+        return True
+    finally:
+        _summarizing.release()
+
+
+def daily_digest():
+    """
+    Daily status report maintenance, run off-peak by the scheduler.
+
+    Summarizes any turns left in conversation_archive.json (e.g. when a
+    foreground contextualize failed) and rotates old status report entries
+    into archive_status.txt.
+    """
+    summarize_archive()
+
+    manage_status_report()
@@ -0,0 +1,153 @@
+"""
+Content-addressed message store.
+
+Every message is stored once in messages.jsonl, keyed by a hash of its
+content. conversation.json, chats/*.json, conversation_archive.json,
+total_archive.json and MEMORY_ARCHIVE/*.json hold lists of message ids.
+Files still in the old shape (lists of message dicts) are read
+transparently and converted by migrate().
+
+    python message_store.py migrate
+    python message_store.py export total_archive.json total_archive_full.json
+"""
+import os
+import sys
+import json
+import hashlib
+import threading
+import persistence
+
+STORE_FILE = "messages.jsonl"
+REF_FILES = ["conversation.json", "conversation_archive.json", "total_archive.json"]
+REF_DIRS = ["chats", "MEMORY_ARCHIVE"]
+
+_messages = None
+_lock = threading.Lock()
+
+
+def message_id(message):
+    canonical = json.dumps(message, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+def _load_store():
+    global _messages
+    if _messages is not None:
+        return _messages
+    _messages = {}
+    if os.path.exists(STORE_FILE):
+        _truncate_torn_tail()
+        with open(STORE_FILE, "r") as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Warning: Skipping unreadable line {number} of {STORE_FILE}")
+                    continue
+                _messages[entry["id"]] = entry["message"]
+    return _messages
+
+
+def _truncate_torn_tail():
+    """
+    Cut a partial last line left by a crash mid-append. No ref list points at
+    it yet (refs are written after the append returns), and leaving it would
+    glue the next appended line onto it.
+    """
+    with open(STORE_FILE, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            end = data.rfind(b"\n") + 1
+            print(f"Warning: Dropping {len(data) - end} bytes of a torn line at the end of {STORE_FILE}")
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def put_many(messages):
+    """Store messages, returning their ids. Only new messages touch the disk."""
+    with _lock:
+        store = _load_store()
+        ids = []
+        new_lines = []
+        for message in messages:
+            mid = message_id(message)
+            if mid not in store:
+                store[mid] = message
+                new_lines.append(json.dumps({"id": mid, "message": message}) + "\n")
+            ids.append(mid)
+        if new_lines:
+            # Appended synchronously so the store is always ahead of the (write-behind) ref lists
+            with open(STORE_FILE, "a") as f:
+                f.writelines(new_lines)
+                f.flush()
+                if persistence.FSYNC_POLICY != "never":
+                    os.fsync(f.fileno())
+        return ids
+
+
+def get_many(ids):
+    with _lock:
+        store = _load_store()
+        return [store[mid] for mid in ids]
+
+
+def _is_legacy(data):
+    return any(isinstance(item, dict) for item in data)
+
+
+def load_messages(path, default=None):
+    """Messages referenced by path, accepting both id lists and the old full-message lists"""
+    data = persistence.load_json(path)
+    if data is None:
+        return default
+    if _is_legacy(data):
+        return data
+    return get_many(data)
+
+
+def save_messages(path, messages):
+    persistence.save_json(path, put_many(messages))
+
+
+def append_messages(path, messages):
+    """Extend the list at path without resolving the messages already in it"""
+    data = persistence.load_json(path, [])
+    ids = put_many(data) if _is_legacy(data) else data
+    persistence.save_json(path, ids + put_many(messages))
+
+
+def migrate():
+    """Convert every message list file still in the old shape to id lists"""
+    paths = [p for p in REF_FILES if os.path.exists(p)]
+    for directory in REF_DIRS:
+        if os.path.isdir(directory):
+            paths += [os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.endswith(".json")]
+
+    migrated = []
+    for path in paths:
+        try:
+            data = persistence.load_json(path)
+        except json.JSONDecodeError as e:
+            print(f"Warning: Skipping {path}, not valid JSON: {e}")
+            continue
+        if isinstance(data, list) and _is_legacy(data):
+            save_messages(path, data)
+            migrated.append(path)
+    persistence.flush()
+    return migrated
+
+
+def export(path, out_path):
+    """Write path back out in the old shape (a list of full messages)"""
+    persistence.write_json_atomic(out_path, load_messages(path, []))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        for path in migrate():
+            print(f"Migrated {path}")
+    elif len(sys.argv) == 4 and sys.argv[1] == "export":
+        export(sys.argv[2], sys.argv[3])
+    else:
+        print(__doc__)
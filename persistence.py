@@ -0,0 +1,219 @@
+"""
+Write-behind persistence for the JSON/text state files.
+
+Saves are staged in memory and written out together COALESCE_SECONDS after
+the first one, so a turn that touches conversation.json, the chat file,
+total_archive.json, status_report.txt and memory.json costs one batch of
+writes, and repeated saves of the same file in the window cost one write.
+Every write goes to a temp file that is fsynced and renamed over the target,
+so a crash leaves either the old or the new version, never a torn file.
+
+Reads of staged files are served from memory, so load_json/load_text must be
+used for any file that is saved through this module.
+"""
+import os
+import copy
+import json
+import stat
+import time
+import atexit
+import tempfile
+import threading
+
+COALESCE_SECONDS = 1.0
+RETRY_SECONDS = 5.0        # delay before the first retry of a failed write, doubled each time
+MAX_WRITE_ATTEMPTS = 5     # then the save is dropped (the in-memory copy is gone with it)
+# "always": fsync the file and its directory (rename is durable)
+# "file":   fsync the file only (no torn files, rename may be lost on power loss)
+# "never":  leave it to the OS
+FSYNC_POLICY = "always"
+
+_DELETED = object()
+_pending = {}    # path -> ("json", obj) | ("text", str) | _DELETED
+_inflight = {}   # batch currently being written, still visible to readers
+_lock = threading.RLock()
+_flush_lock = threading.Lock()
+_timer = None
+_timer_due = 0.0
+_failures = {}   # path -> failed attempts of the currently staged save
+
+# Read once at import: os.umask can only be queried by setting it, which isn't thread safe later
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows can't open directories
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_text_atomic(path, text, fsync_policy=None):
+    """Write text to path via temp file + rename, bypassing the write-behind queue"""
+    policy = fsync_policy or FSYNC_POLICY
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            if policy != "never":
+                os.fsync(f.fileno())
+        # mkstemp creates 0600 files; keep the target's mode, or what open() would have given it
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if policy == "always":
+        _fsync_dir(directory)
+
+
+def write_json_atomic(path, obj, fsync_policy=None):
+    write_text_atomic(path, json.dumps(obj, indent=2), fsync_policy)
+
+
+def _schedule_flush(delay):
+    """Flush within delay seconds; an earlier timer is kept, a later (retry) one is brought forward"""
+    global _timer, _timer_due
+    with _lock:
+        due = time.monotonic() + delay
+        if _timer is not None:
+            if _timer_due <= due:
+                return
+            _timer.cancel()
+        _timer = threading.Timer(delay, flush)
+        _timer.daemon = True
+        _timer.start()
+        _timer_due = due
+
+
+def _stage(path, entry):
+    with _lock:
+        _pending[path] = entry
+        _failures.pop(path, None)  # new content gets a fresh set of attempts
+        _schedule_flush(COALESCE_SECONDS)
+
+
+def _lookup(path):
+    """Staged entry for path, or None if the disk copy is current"""
+    with _lock:
+        if path in _pending:
+            return _pending[path]
+        return _inflight.get(path)
+
+
+def save_json(path, obj):
+    """Stage obj for path. The caller must not mutate obj afterwards."""
+    _stage(path, ("json", obj))
+
+
+def save_text(path, text):
+    _stage(path, ("text", text))
+
+
+def append_text(path, text):
+    with _lock:
+        current = load_text(path, "")
+        _stage(path, ("text", current + text))
+
+
+def remove(path):
+    _stage(path, _DELETED)
+
+
+def exists(path):
+    entry = _lookup(path)
+    if entry is None:
+        return os.path.exists(path)
+    return entry is not _DELETED
+
+
+def load_json(path, default=None):
+    """Staged or on-disk JSON for path; default if it doesn't exist"""
+    entry = _lookup(path)
+    if entry is _DELETED:
+        return default
+    if entry is not None:
+        kind, value = entry
+        # Shallow copy so callers can extend/modify without touching the staged snapshot
+        return copy.copy(value) if kind == "json" else json.loads(value)
+    try:
+        with open(path, "r") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return default
+    # The repo ships some state files empty; treat those like missing files
+    return json.loads(text) if text.strip() else default
+
+
+def load_text(path, default=None):
+    entry = _lookup(path)
+    if entry is _DELETED:
+        return default
+    if entry is not None:
+        kind, value = entry
+        return value if kind == "text" else json.dumps(value, indent=2)
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return default
+
+
+def flush():
+    """Write out everything staged so far. Safe to call from any thread."""
+    global _timer, _inflight
+    with _flush_lock:
+        with _lock:
+            if _timer is not None:
+                _timer.cancel()
+                _timer = None
+            batch = dict(_pending)
+            _pending.clear()
+            _inflight = batch
+
+        try:
+            for path, entry in batch.items():
+                try:
+                    if entry is _DELETED:
+                        if os.path.exists(path):
+                            os.remove(path)
+                    else:
+                        kind, value = entry
+                        if kind == "json":
+                            write_json_atomic(path, value)
+                        else:
+                            write_text_atomic(path, value)
+                    with _lock:
+                        _failures.pop(path, None)
+                except Exception as e:
+                    with _lock:
+                        if path in _pending:
+                            continue  # a newer save superseded it and will be tried on its own
+                        attempts = _failures.get(path, 0) + 1
+                        if attempts >= MAX_WRITE_ATTEMPTS:
+                            print(f"Warning: Giving up on {path} after {attempts} failed writes: {e}")
+                            _failures.pop(path, None)
+                            continue
+                        if attempts == 1:
+                            print(f"Warning: Failed to write {path}, retrying: {e}")
+                        _failures[path] = attempts
+                        _pending[path] = entry
+                        _schedule_flush(RETRY_SECONDS * 2 ** (attempts - 1))
+        finally:
+            with _lock:
+                _inflight = {}
+
+
+atexit.register(flush)
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# Set PREWARM_CACHE=0 to turn warmups off
+ENABLED = os.environ.get("PREWARM_CACHE", "1") != "0"
+IDLE_SECONDS = 2.0      # only warm after this long without a live /api/chat request
+MAX_WAIT_SECONDS = 60.0  # give up if traffic never goes quiet; a live turn will create the cache anyway
+CACHE_TTL_SECONDS = 5 * 60  # lifetime of an ephemeral cache entry since its last use
+LOG_FILE = "prewarm_log.jsonl"
+
+
+def prompt_hash(system_message):
+    return hashlib.sha256(system_message.encode("utf-8")).hexdigest()[:16]
+
+
+class Prewarmer:
+    """
+    Creates the prompt cache entry for the system block before the first
+    real turn needs it.
+
+    The warmup is a max_tokens=1 request with the same cached system block
+    the chat uses. It runs on a background thread, waits for live traffic to
+    go quiet, and is skipped if a live turn already used the prompt. The
+    first live turn after every prompt change is logged to LOG_FILE with
+    whether it was warmed, so cold and warm latencies can be compared.
+    """
+
+    def __init__(self, client, model):
+        self.client = client
+        self.model = model
+        self._lock = threading.Lock()
+        self._live = 0
+        self._last_live = 0.0
+        self._warmed = {}          # prompt hash -> last time we (or a live turn) used its cache entry
+        self._first_turn_seen = set()
+
+    def request_warm(self, system_message):
+        if not ENABLED:
+            return
+        threading.Thread(target=self._warm_when_idle, args=(system_message,),
+                         name="prompt-prewarm", daemon=True).start()
+
+    def _warm_when_idle(self, system_message):
+        key = prompt_hash(system_message)
+        deadline = time.time() + MAX_WAIT_SECONDS
+        while time.time() < deadline:
+            with self._lock:
+                if self._is_warm(key):
+                    return
+                idle = self._live == 0 and time.time() - self._last_live >= IDLE_SECONDS
+            if idle:
+                break
+            time.sleep(0.2)
+        else:
+            return
+
+        try:
+            start_time = time.time()
+            response = self.warm(system_message)
+            elapsed = time.time() - start_time
+        except Exception as e:
+            print(f"Warning: Prompt cache warmup failed: {e}")
+            return
+        with self._lock:
+            self._warmed[key] = time.time()
+        self._log({
+            "event": "warmup",
+            "prompt": key,
+            "latency": round(elapsed, 3),
+            "cache_creation_input_tokens": getattr(response.usage, "cache_creation_input_tokens", None),
+        })
+
+    def warm(self, system_message):
+        return self.client.messages.create(
+            model=self.model,
+            extra_headers={
+                "anthropic-beta": "prompt-caching-2024-07-31"
+            },
+            max_tokens=1,
+            system=[
+                {
+                    "type": "text",
+                    "text": system_message,
+                    "cache_control": {"type": "ephemeral"}
+                },
+            ],
+            messages=[{"role": "user", "content": "ok"}],
+        )
+
+    def _is_warm(self, key):
+        return time.time() - self._warmed.get(key, 0) < CACHE_TTL_SECONDS
+
+    def live_started(self):
+        with self._lock:
+            self._live += 1
+
+    def live_finished(self, system_message, latency, usage=None):
+        """Call after every live turn; usage is None if the request failed"""
+        key = prompt_hash(system_message)
+        with self._lock:
+            self._live -= 1
+            self._last_live = time.time()
+            if usage is None:
+                return
+            warmed = self._is_warm(key)
+            self._warmed[key] = time.time()
+            first_turn = key not in self._first_turn_seen
+            self._first_turn_seen.add(key)
+        if first_turn:
+            self._log({
+                "event": "first_turn",
+                "prompt": key,
+                "warmed": warmed,
+                "latency": round(latency, 3),
+                "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None),
+                "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None),
+            })
+
+    def _log(self, entry):
+        entry["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        print(f"Prewarm: {entry}")
+        with open(LOG_FILE, "a") as f:
+            f.write(json.dumps(entry) + "\n")
@@ -0,0 +1,301 @@
+"""
+Replay months of synthetic (or recorded) usage through the memory pipeline
+and record how each operation scales as the state files grow.
+
+Runs in a scratch directory against stub_api.StubClient, so nothing real is
+touched and no API calls are made. Each simulated day:
+  - turns_per_day chat turns go through ConversationHistory and
+    manage_conversation_history (-> process_archived_messages -> contextualize)
+  - chats_per_day conversations are saved to chats/ and imported through
+    memory.initialize, as on a restart
+  - the scheduler's daily jobs run (decay, daily_digest, check_long_term_memory)
+
+The pipeline's modules see a simulated date (day N of the run is
+--start-date + N), so task aging, decay and summary timestamps progress
+as they would over real months.
+
+    python replay_growth.py --days 90 --turns-per-day 40 --out growth
+    python replay_growth.py --replay path/to/chats --days 30
+
+Writes <out>/growth.csv (one row per day) and, if matplotlib is installed,
+<out>/latency.png, <out>/sizes.png and <out>/rss.png.
+"""
+import io
+import os
+import sys
+import csv
+import time
+import json
+import types
+import random
+import shutil
+import argparse
+import datetime
+import resource
+import tempfile
+import contextlib
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TRACKED_FILES = [
+    "conversation.json", "total_archive.json", "messages.jsonl", "memory.json",
+    "status_report.txt", "archive_status.txt", "lt_memory.txt",
+]
+TOPICS = [
+    "thesis", "chapter", "deadline", "budget", "grant", "meeting", "travel",
+    "server", "backup", "draft", "review", "invoice", "client", "schedule",
+    "workout", "reading", "paper", "experiment", "dataset", "proposal",
+    "apartment", "insurance", "conference", "slides", "feedback", "refactor",
+]
+
+
+class SimulatedClock:
+    """
+    Stand-in for the datetime module in the pipeline's modules: date.today()
+    and datetime.now() return the simulated day (at the real time of day).
+    """
+
+    def __init__(self, start):
+        self.day = start
+        clock = self
+
+        class SimulatedDate(datetime.date):
+            @classmethod
+            def today(cls):
+                return clock.day
+
+        class SimulatedDateTime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.datetime.combine(clock.day, datetime.datetime.now(tz).timetz())
+
+        self.module = types.ModuleType("datetime")
+        self.module.__dict__.update(datetime.__dict__)
+        self.module.date = SimulatedDate
+        self.module.datetime = SimulatedDateTime
+
+    def install(self, *modules):
+        for module in modules:
+            module.datetime = self.module
+
+
+def synthetic_turn(rng, words):
+    topic = rng.sample(TOPICS, 3)
+    filler = " ".join(rng.choice(TOPICS + ["the", "and", "then", "maybe", "need"]) for _ in range(words))
+    return f"About the {topic[0]} and {topic[1]}: {filler}. Also {topic[2]}."
+
+
+def recorded_turns(replay_dir):
+    """
+    Turn texts from chats/*.json style files, in order. Files must be in the
+    full-message shape; export id-list files first with message_store.py export.
+    """
+    texts = []
+    for name in sorted(os.listdir(replay_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(replay_dir, name), "r") as f:
+                turns = json.load(f)
+            if any(not isinstance(turn, dict) for turn in turns):
+                print(f"Warning: {name} holds message ids, export it first; skipping")
+                continue
+            texts.extend((turn["role"], turn["content"][0]["text"]) for turn in turns)
+    return texts
+
+
+class Timings:
+    """Wraps module functions so every call's latency is recorded per day"""
+
+    def __init__(self):
+        self.day = defaultdict(list)
+
+    def wrap(self, module, name, label=None):
+        original = getattr(module, name)
+        label = label or name
+
+        def timed(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.day[label].append(time.perf_counter() - start_time)
+
+        setattr(module, name, timed)
+
+    def take(self):
+        day, self.day = self.day, defaultdict(list)
+        return day
+
+
+def simulate_day(app, memory, scheduler, persistence, args, day, next_text):
+    for turn in range(args.turns_per_day):
+        # Same sequence as api_chat, minus the chat model call
+        app.conversation_history.add_turn_user(next_text("user"))
+        app.conversation_history.add_turn_assistant(next_text("assistant"))
+        app.manage_conversation_history()
+        app.conversation_history.save_to_json("conversation.json")
+
+        if args.chats_per_day and turn % max(1, args.turns_per_day // args.chats_per_day) == 0:
+            if not os.path.exists("chats"):
+                os.makedirs("chats")
+            app.conversation_history.save_to_json(f"chats/day{day}_turn{turn}.json")
+
+    persistence.flush()
+    # Overnight: restart-style chat import, then the scheduler's daily jobs
+    memory.initialize()
+    scheduler.run_decay_sweep()
+    memory.daily_digest()
+    memory.check_long_term_memory()
+    persistence.flush()
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="replay_growth_")
+    shutil.copy(os.path.join(REPO_DIR, "system.txt"), workdir)
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    os.environ.setdefault("ANTHROPIC_API_KEY", "stub")
+    os.environ["PREWARM_CACHE"] = "0"
+
+    import stub_api
+    import persistence
+    import message_store
+    import memory
+    import task_agent
+    import scheduler
+    import app
+
+    clock = SimulatedClock(args.start_date)
+    clock.install(task_agent, memory, scheduler, app)
+
+    stub = stub_api.StubClient()
+    memory.client = task_agent.client = app.client = stub
+
+    timings = Timings()
+    timings.wrap(app, "manage_conversation_history")
+    timings.wrap(task_agent, "process_archived_messages")
+    timings.wrap(memory, "contextualize")
+    timings.wrap(memory, "check_long_term_memory")
+    timings.wrap(memory, "manage_status_report")
+    timings.wrap(memory, "initialize")
+    timings.wrap(message_store, "save_messages")
+    timings.wrap(persistence, "flush")
+    timings.wrap(scheduler, "run_decay_sweep")
+
+    rng = random.Random(args.seed)
+    recorded = recorded_turns(args.replay) if args.replay else None
+    position = 0
+
+    def next_text(role):
+        nonlocal position
+        if recorded:
+            text = recorded[position % len(recorded)][1]
+            position += 1
+            return text
+        return synthetic_turn(rng, args.words_per_turn if role == "user" else args.words_per_turn * 3)
+
+    rows = []
+    for day in range(args.days):
+        clock.day = args.start_date + datetime.timedelta(days=day)
+        day_start = time.perf_counter()
+        # The pipeline prints whole chats and briefings; keep only our summary line
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            simulate_day(app, memory, scheduler, persistence, args, day, next_text)
+
+        ops = timings.take()
+        row = {"day": day + 1, "date": clock.day.isoformat(), "wall_s": round(time.perf_counter() - day_start, 4),
+               "peak_rss_mb": round(peak_rss_mb(), 1), "model_calls": stub.calls}
+        for label, samples in sorted(ops.items()):
+            row[f"{label}_ms_mean"] = round(1000 * sum(samples) / len(samples), 3)
+            row[f"{label}_ms_max"] = round(1000 * max(samples), 3)
+        if os.path.exists("memory.json"):
+            with open("memory.json", "r") as f:
+                tasks = json.load(f)
+            row["active_tasks"] = len(tasks.get("active_tasks", []))
+            row["archived_tasks"] = len(tasks.get("archived_tasks", []))
+        for name in TRACKED_FILES:
+            row[f"{name}_kb"] = round(os.path.getsize(name) / 1024, 1) if os.path.exists(name) else 0
+        rows.append(row)
+        print(f"day {row['day']:>4}  wall {row['wall_s']:>8.3f}s  rss {row['peak_rss_mb']:>7.1f}MB  "
+              f"total_archive {row['total_archive.json_kb']:>8.1f}KB  archive_status {row['archive_status.txt_kb']:>8.1f}KB")
+
+    return rows, workdir
+
+
+def write_csv(rows, path):
+    columns = []
+    for row in rows:
+        columns += [c for c in row if c not in columns]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot(rows, out_dir):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("Warning: matplotlib not installed, skipping plots (growth.csv has the data)")
+        return
+
+    days = [r["day"] for r in rows]
+    charts = [
+        ("latency.png", "mean latency per call (ms)", lambda c: c.endswith("_ms_mean"), "_ms_mean"),
+        ("sizes.png", "file size (KB)", lambda c: c.endswith("_kb"), "_kb"),
+        ("rss.png", "peak RSS (MB)", lambda c: c == "peak_rss_mb", ""),
+    ]
+    for filename, ylabel, wanted, suffix in charts:
+        columns = sorted({c for r in rows for c in r if wanted(c)})
+        fig, ax = plt.subplots(figsize=(10, 6))
+        for column in columns:
+            label = column[: -len(suffix)] if suffix else column
+            ax.plot(days, [r.get(column, 0) for r in rows], label=label)
+        ax.set_xlabel("simulated day")
+        ax.set_ylabel(ylabel)
+        ax.legend(fontsize="small")
+        fig.tight_layout()
+        fig.savefig(os.path.join(out_dir, filename))
+        plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--turns-per-day", type=int, default=40)
+    parser.add_argument("--words-per-turn", type=int, default=60)
+    parser.add_argument("--chats-per-day", type=int, default=1, help="chats saved to chats/ and imported each day")
+    parser.add_argument("--replay", help="directory of chats/*.json files to replay instead of synthetic turns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-date", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="simulated date of the first day (YYYY-MM-DD)")
+    parser.add_argument("--out", default="growth")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch state directory")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    args = parser.parse_args()
+    out_dir = os.path.abspath(args.out)
+    if args.replay:
+        args.replay = os.path.abspath(args.replay)
+
+    rows, workdir = run(args)
+    os.makedirs(out_dir, exist_ok=True)
+    write_csv(rows, os.path.join(out_dir, "growth.csv"))
+    plot(rows, out_dir)
+    print(f"Results in {out_dir}")
+    if args.keep:
+        print(f"State kept in {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
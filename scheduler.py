@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import random
+import datetime
+import threading
+import memory
+import task_agent
+import persistence
+
+STATE_FILE = "scheduler_state.json"
+BRIEFING_FILE = "morning_briefing.txt"
+LOCK_DIR = ".locks"
+OFF_PEAK_HOUR = 4          # local hour after which the daily jobs may run
+JITTER_SECONDS = 30 * 60   # random per process and day, so several instances don't all fire at once
+IDLE_SECONDS = 10 * 60     # jobs only start after this long without a live chat request (or startup)
+POLL_SECONDS = 60
+STALE_LOCK_SECONDS = 60 * 60
+RETRY_SECONDS = 60 * 60    # back off after a failure instead of retrying every poll
+
+_thread = None
+_failed_at = {}
+listeners = []  # called after any job ran, e.g. to re-render the system prompt
+_stop = threading.Event()
+_run_lock = threading.Lock()
+_jitter = {}
+_live = 0
+_last_live = time.time()  # startup counts as activity: the first request of the day is likely near
+_live_lock = threading.Lock()
+
+
+def live_started():
+    global _live
+    with _live_lock:
+        _live += 1
+
+
+def live_finished():
+    global _live, _last_live
+    with _live_lock:
+        _live -= 1
+        _last_live = time.time()
+
+
+def _is_idle():
+    with _live_lock:
+        return _live == 0 and time.time() - _last_live >= IDLE_SECONDS
+
+
+def run_decay_sweep():
+    """Archive decayed tasks in memory.json"""
+    manager = task_agent.TaskManager()
+    manager._check_decay()
+    manager.save()
+
+
+def run_daily_digest():
+    """Summarize leftover archived turns and rotate the status report"""
+    memory.daily_digest()
+
+
+def run_long_term_memory():
+    memory.check_long_term_memory()
+
+
+def run_morning_briefing():
+    """Precompute the briefing so the first request of the day only reads it"""
+    briefing = task_agent.TaskManager().generate_morning_briefing()
+    persistence.write_text_atomic(
+        BRIEFING_FILE,
+        f"--- Morning Briefing {datetime.date.today().isoformat()} ---\n{briefing}\n"
+    )
+
+
+# Order matters: the briefing should reflect the decay sweep of the same day.
+JOBS = [
+    ("decay", run_decay_sweep),
+    ("digest", run_daily_digest),
+    ("long_term_memory", run_long_term_memory),
+    ("morning_briefing", run_morning_briefing),
+]
+
+
+def read_briefing():
+    """Return today's precomputed briefing, or None if it hasn't been generated yet"""
+    if not os.path.exists(BRIEFING_FILE):
+        return None
+    with open(BRIEFING_FILE, "r") as f:
+        content = f.read()
+    header = f"--- Morning Briefing {datetime.date.today().isoformat()} ---\n"
+    if not content.startswith(header):
+        return None
+    return content[len(header):].rstrip("\n")
+
+
+def _load_state():
+    try:
+        with open(STATE_FILE, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_state(state):
+    # Written immediately: other processes check it before taking a job
+    persistence.write_json_atomic(STATE_FILE, state)
+
+
+def _acquire_file_lock(name):
+    """Single-flight across processes (e.g. the Flask reloader) via O_EXCL lock files"""
+    if not os.path.exists(LOCK_DIR):
+        os.makedirs(LOCK_DIR)
+    path = os.path.join(LOCK_DIR, f"{name}.lock")
+    try:
+        if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None
+    os.write(fd, str(os.getpid()).encode())
+    os.close(fd)
+    return path
+
+
+def _release_file_lock(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _due_at(day):
+    """Off-peak start time for the given day, with a random jitter"""
+    jitter = _jitter.setdefault(day, random.uniform(0, JITTER_SECONDS))
+    start = datetime.datetime.combine(day, datetime.time(hour=OFF_PEAK_HOUR))
+    return start + datetime.timedelta(seconds=jitter)
+
+
+def run_pending(now=None):
+    """
+    Run every job that hasn't run yet today, once its off-peak slot has
+    passed and there has been no chat traffic for IDLE_SECONDS
+    """
+    now = now or datetime.datetime.now()
+    today = now.date().isoformat()
+    if now < _due_at(now.date()):
+        return []
+
+    if not _run_lock.acquire(blocking=False):
+        return []
+    ran = []
+    try:
+        for name, job in JOBS:
+            if _load_state().get(name) == today:
+                continue
+            if time.time() - _failed_at.get(name, 0) < RETRY_SECONDS:
+                continue
+            # Checked per job: a chat may start while an earlier job runs
+            if not _is_idle():
+                break
+            lock_path = _acquire_file_lock(name)
+            if lock_path is None:
+                continue
+            try:
+                # Re-check after taking the lock; another process may have finished it.
+                state = _load_state()
+                if state.get(name) == today:
+                    continue
+                start_time = time.time()
+                job()
+                print(f"Scheduler: {name} finished in {time.time() - start_time:.1f}s")
+                state = _load_state()
+                state[name] = today
+                _save_state(state)
+                ran.append(name)
+            except Exception as e:
+                _failed_at[name] = time.time()
+                print(f"Warning: Scheduled job {name} failed: {e}")
+            finally:
+                _release_file_lock(lock_path)
+    finally:
+        _run_lock.release()
+    if ran:
+        for listener in listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"Warning: Scheduler listener failed: {e}")
+    return ran
+
+
+def _loop():
+    while not _stop.is_set():
+        run_pending()
+        _stop.wait(POLL_SECONDS)
+
+
+def start():
+    """Start the background maintenance thread (idempotent)"""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="memory-scheduler", daemon=True)
+    _thread.start()
+
+
+def stop():
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=POLL_SECONDS)
@@ -0,0 +1,157 @@
+"""
+Local stand-in for the Anthropic Messages API, for trying the app and the
+prompt cache warmup without a key or network.
+
+    python stub_api.py --port 8765
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=stub python app.py
+
+Requests whose cached system block was seen in the last CACHE_TTL_SECONDS
+are answered after WARM_DELAY, others after COLD_DELAY plus a per-token
+cost, and usage reports cache reads/creations accordingly.
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COLD_DELAY = 1.0
+WARM_DELAY = 0.2
+COLD_SECONDS_PER_1K_TOKENS = 0.05
+CACHE_TTL_SECONDS = 5 * 60
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _cached_prefix(body):
+    """Text of the system blocks marked with cache_control, if any"""
+    system = body.get("system") or []
+    if isinstance(system, str):
+        return ""
+    return "".join(block.get("text", "") for block in system if block.get("cache_control"))
+
+
+def reply_text(body):
+    """
+    Canned reply shaped like what each prompt in the app expects: task
+    commands for the task manager, bullet summaries for the memory prompts,
+    so replays grow the state files at a realistic rate.
+    """
+    messages = body.get("messages") or []
+    last = messages[-1]["content"] if messages else ""
+    if isinstance(last, list):
+        last = " ".join(block.get("text", "") for block in last)
+    # Seeded by the prompt, so identical requests get identical replies
+    rng = random.Random(hashlib.sha256(last.encode("utf-8")).hexdigest())
+    words = [w for w in last.split() if w.isalpha() and len(w) > 3] or ["stub"]
+
+    if "You are the task management module" in last:
+        commands = []
+        for _ in range(rng.randint(1, 3)):
+            description = " ".join(rng.choice(words) for _ in range(4))
+            commands.append(f"NEW|{rng.randint(1, 5)}|{description}|from stub|none")
+        ids = [line.split("]")[0][1:] for line in last.splitlines() if line.startswith("[")]
+        if ids and rng.random() < 0.5:
+            commands.append(f"DONE|{rng.choice(ids)}")
+        return "\n".join(commands)
+    if "analyze these memories chronologically" in last:
+        return " ".join(rng.choice(words) for _ in range(1000))
+    if "extract important points" in last:
+        return "\n".join(
+            "- " + " ".join(rng.choice(words) for _ in range(18)) + " --> follow up"
+            for _ in range(rng.randint(3, 6))
+        )
+    return f"stub reply to {len(last.split())} words"
+
+
+class StubClient:
+    """In-process drop-in for Anthropic(): client.messages.create(**kwargs)"""
+
+    def __init__(self):
+        self.messages = self
+        self.calls = 0
+
+    def create(self, **body):
+        self.calls += 1
+        body.pop("extra_headers", None)
+        text = reply_text(body)
+        return types.SimpleNamespace(
+            content=[types.SimpleNamespace(type="text", text=text)],
+            usage=types.SimpleNamespace(input_tokens=10, output_tokens=len(text.split()),
+                                        cache_creation_input_tokens=0, cache_read_input_tokens=0),
+        )
+
+
+def handle_messages(body):
+    prefix = _cached_prefix(body)
+    tokens = _estimate_tokens(prefix) if prefix else 0
+    key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+    now = time.time()
+    with _cache_lock:
+        hit = bool(prefix) and now - _cache.get(key, 0) < CACHE_TTL_SECONDS
+        if prefix:
+            _cache[key] = now
+    if hit:
+        time.sleep(WARM_DELAY)
+    else:
+        time.sleep(COLD_DELAY + COLD_SECONDS_PER_1K_TOKENS * tokens / 1000)
+
+    text = reply_text(body)
+    if body.get("max_tokens", 1) <= 1:
+        text = text.split()[0]
+    return {
+        "id": f"msg_stub_{int(now * 1000)}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "stub"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": 10,
+            "output_tokens": len(text.split()),
+            "cache_creation_input_tokens": 0 if hit else tokens,
+            "cache_read_input_tokens": tokens if hit else 0,
+        },
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.startswith("/v1/messages"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        payload = json.dumps(handle_messages(body)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=8765):
+    """Start the stub on a background thread and return the server"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    print(f"Stub Anthropic API on http://127.0.0.1:{args.port}")
+    ThreadingHTTPServer(("127.0.0.1", args.port), Handler).serve_forever()
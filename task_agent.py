@@ -4,6 +4,8 @@ import uuid
 from typing import List, Optional
 from anthropic import Anthropic
 import os
+from task_index import TaskIndex
+import persistence
 
 client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
 MODEL = "claude-3-5-sonnet-20241022"
@@ -57,23 +59,21 @@ class TaskManager:
         self.active_tasks: List[Task] = []
         self.archived_tasks: List[Task] = []
         self._load()
+        self.index = TaskIndex()
+        for task in self.active_tasks:
+            self.index.add(task.id, task.description)
 
     def _load(self):
-        try:
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-                self.active_tasks = [Task.from_dict(t) for t in data.get('active_tasks', [])]
-                self.archived_tasks = [Task.from_dict(t) for t in data.get('archived_tasks', [])]
-        except FileNotFoundError:
-            pass
+        data = persistence.load_json(self.filename, {})
+        self.active_tasks = [Task.from_dict(t) for t in data.get('active_tasks', [])]
+        self.archived_tasks = [Task.from_dict(t) for t in data.get('archived_tasks', [])]
 
     def save(self):
         data = {
             'active_tasks': [t.to_dict() for t in self.active_tasks],
             'archived_tasks': [t.to_dict() for t in self.archived_tasks]
         }
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        persistence.save_json(self.filename, data)
 
     def process_conversation(self, messages: List[str]):
         prompt = self._create_prompt(messages)
@@ -164,23 +164,42 @@ OUTPUT COMMANDS:"""
             next_date = (today + datetime.timedelta(days=7))
             if parts[3] != "none":
                 next_date = datetime.date.fromisoformat(parts[3])
-            
-            self.active_tasks.append(Task(
+
+            # Restated task: merge into the existing one instead of adding a duplicate
+            duplicate = self.index.find_duplicate(description)
+            if duplicate:
+                self._merge_task(duplicate[0], duplicate[1], description, priority, note, next_date, today)
+                return
+
+            task = Task(
                 description=description,
                 priority=priority,
                 note=note,
                 next_date=next_date
-            ))
+            )
+            self.active_tasks.append(task)
+            self.index.add(task.id, task.description)
 
             while len(self.active_tasks) > 50:
                 sorted_tasks = sorted(self.active_tasks, key=...)
                 task_to_archive = sorted_tasks[-1]  
                 self.active_tasks.remove(task_to_archive)
+                self.index.remove(task_to_archive.id)
                 task_to_archive.status = "archived"
                 self.archived_tasks.append(task_to_archive)
         except:
             pass
 
+    def _merge_task(self, task_id: str, score: float, description: str, priority: int, note: str,
+                    next_date: datetime.date, today: datetime.date):
+        task = next(t for t in self.active_tasks if t.id == task_id)
+        # The log is the record of the new wording; the note is in every prompt, so it isn't appended to
+        print(f"Task index: merged NEW '{description}' into [{task.id}] '{task.description}' (similarity {score:.2f})")
+        task.priority = min(task.priority, priority)
+        task.next_date = min(task.next_date, next_date)
+        task.note = task.note or note
+        task.last_interaction = today
+
     def _update_task(self, action: str, task_id: str, value: Optional[str], today: datetime.date):
         task = next((t for t in self.active_tasks + self.archived_tasks if t.id == task_id), None)
         if not task:
@@ -202,6 +221,7 @@ OUTPUT COMMANDS:"""
                 task.status = "completed"
                 if task in self.active_tasks:
                     self.active_tasks.remove(task)
+                    self.index.remove(task.id)
                     self.archived_tasks.append(task)
         except:
             pass
@@ -220,6 +240,7 @@ OUTPUT COMMANDS:"""
             if decay_factor > threshold:
                 task.status = "archived"
                 self.active_tasks.remove(task)
+                self.index.remove(task.id)
                 self.archived_tasks.append(task)
 
     def generate_morning_briefing(self) -> str:
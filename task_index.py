@@ -0,0 +1,173 @@
+import re
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Cosine similarity a candidate needs before the word-level check is tried.
+# Tuned with bench_task_index.py, including its hard negatives.
+DEFAULT_THRESHOLD = 0.5
+
+# Shortest word a one-letter typo is tolerated in; shorter words differ too easily ("march"/"match")
+TYPO_MIN_LENGTH = 7
+
+STOPWORDS = {
+    "a", "an", "the", "to", "of", "for", "and", "or", "on", "in", "at", "by",
+    "with", "my", "our", "your", "is", "be", "it", "this", "that", "about",
+    "up", "some", "please", "need", "needs", "should", "must", "get",
+    # time fillers the model adds when restating a task; the date lives in next_date
+    "asap", "today", "tomorrow", "week", "before", "soon", "now",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+}
+
+# Only clear synonyms; "cancel"/"schedule" or "review"/"write" must stay different tasks
+SYNONYMS = {
+    "complete": "finish", "finalize": "finish", "finalise": "finish",
+    "draft": "write",
+    "phone": "call", "ring": "call",
+    "reserve": "book",
+    "repair": "fix",
+    "prep": "prepare",
+    "schedule": "book",
+}
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOPWORDS]
+
+
+def _content_words(text: str) -> Set[str]:
+    return {_stem(SYNONYMS.get(w, w)) for w in _words(text)}
+
+
+def _shingles(text: str) -> Counter:
+    """Character trigrams per word, so 'finish'/'finishing' still overlap"""
+    features = Counter()
+    for word in _words(text):
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            features[padded[i:i + 3]] += 1
+    return features
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    # substitution or a single insertion into the shorter word
+    return a[i + 1:] == b[i + 1:] or a[i:] == b[i + 1:]
+
+
+def _typo_candidate(word: str) -> bool:
+    # Numbers, ids and short names ("maria"/"marie", "daniel"/"daniela") must match exactly
+    return len(word) >= TYPO_MIN_LENGTH and word.isalpha()
+
+
+def _word_matches(word: str, others: Set[str]) -> bool:
+    if word in others:
+        return True
+    if not _typo_candidate(word):
+        return False
+    return any(_typo_candidate(o) and o[0] == word[0] and _within_one_edit(word, o) for o in others)
+
+
+def _same_words(a: Set[str], b: Set[str]) -> bool:
+    """Every content word on each side has a counterpart on the other side"""
+    return all(_word_matches(w, b) for w in a) and all(_word_matches(w, a) for w in b)
+
+
+class TaskIndex:
+    """
+    Incremental TF-IDF cosine index over task descriptions.
+
+    Used by TaskManager to catch NEW commands that restate an existing task
+    with different wording. Cosine similarity picks the candidates; a match
+    additionally needs the same content words on both sides (up to a small
+    synonym table, plural/-ing endings and one-letter typos in long words), so "book hotel
+    in Berlin" never merges into "book flight to Berlin", nor "email John"
+    into "email Sarah".
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._features: Dict[str, Counter] = {}
+        self._words: Dict[str, Set[str]] = {}
+        self._df: Counter = Counter()
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self._features)
+
+    def __contains__(self, task_id: str):
+        return task_id in self._features
+
+    def add(self, task_id: str, description: str):
+        if task_id in self._features:
+            self.remove(task_id)
+        features = _shingles(description)
+        self._features[task_id] = features
+        self._words[task_id] = _content_words(description)
+        for feature in features:
+            self._df[feature] += 1
+            self._postings[feature].add(task_id)
+
+    def remove(self, task_id: str):
+        features = self._features.pop(task_id, None)
+        if features is None:
+            return
+        del self._words[task_id]
+        for feature in features:
+            self._df[feature] -= 1
+            if self._df[feature] <= 0:
+                del self._df[feature]
+            self._postings[feature].discard(task_id)
+            if not self._postings[feature]:
+                del self._postings[feature]
+
+    def _idf(self, feature: str) -> float:
+        return math.log((1 + len(self._features)) / (1 + self._df.get(feature, 0))) + 1
+
+    def _vector(self, features: Counter) -> Dict[str, float]:
+        vector = {f: (1 + math.log(tf)) * self._idf(f) for f, tf in features.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {f: w / norm for f, w in vector.items()}
+
+    def query(self, description: str, limit: int = 1) -> List[Tuple[str, float]]:
+        """Return up to `limit` (task_id, cosine) pairs, most similar first"""
+        features = _shingles(description)
+        if not features:
+            return []
+        candidates = set()
+        for feature in features:
+            candidates |= self._postings.get(feature, set())
+        if not candidates:
+            return []
+
+        query_vector = self._vector(features)
+        scores = []
+        for task_id in candidates:
+            vector = self._vector(self._features[task_id])
+            score = sum(w * vector.get(f, 0.0) for f, w in query_vector.items())
+            scores.append((task_id, score))
+        scores.sort(key=lambda s: s[1], reverse=True)
+        return scores[:limit]
+
+    def find_duplicate(self, description: str) -> Optional[Tuple[str, float]]:
+        """(task_id, cosine) of the indexed task this description restates, or None"""
+        words = _content_words(description)
+        for task_id, score in self.query(description, limit=5):
+            if score < self.threshold:
+                break
+            if _same_words(words, self._words[task_id]):
+                return task_id, score
+        return None
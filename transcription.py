@@ -0,0 +1,149 @@
+"""
+Chunked transcription for /api/transcribe.
+
+The page records in short self-contained segments and uploads each one as
+soon as it is closed. Segments are transcribed concurrently while recording
+continues, so when the last one arrives only that segment is left to decode
+and the stitched transcript comes back shortly after the user stops,
+however long the recording was.
+
+Backends are picked with TRANSCRIBE_BACKEND ("groq" or "stub"); the Groq
+key is read from GROQ_API_KEY on the server instead of living in the page.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+MAX_WORKERS = 4
+FINAL_TIMEOUT_SECONDS = 30    # how long the final request waits for missing/slow segments
+SESSION_TTL_SECONDS = 30 * 60
+
+
+class GroqBackend:
+    """Whisper via Groq's OpenAI-compatible transcription endpoint"""
+
+    URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+
+    def __init__(self, api_key=None, model="whisper-large-v3"):
+        self.api_key = api_key or os.environ.get("GROQ_API_KEY")
+        self.model = model
+
+    def transcribe(self, audio, filename, mimetype):
+        import httpx  # installed with the anthropic SDK
+        if not self.api_key:
+            raise RuntimeError("GROQ_API_KEY is not set")
+        response = httpx.post(
+            self.URL,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            data={"model": self.model},
+            files={"file": (filename, audio, mimetype)},
+            timeout=60,
+        )
+        response.raise_for_status()
+        return response.json()["text"]
+
+
+class StubBackend:
+    """Local stand-in: returns a fixed-shape text per segment after an optional delay"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def transcribe(self, audio, filename, mimetype):
+        if self.delay:
+            time.sleep(self.delay)
+        return f"[{filename}: {len(audio)} bytes]"
+
+
+def make_backend(name=None):
+    name = name or os.environ.get("TRANSCRIBE_BACKEND", "groq")
+    if name == "stub":
+        return StubBackend(float(os.environ.get("TRANSCRIBE_STUB_DELAY", "0")))
+    if name == "groq":
+        return GroqBackend()
+    raise ValueError(f"Unknown transcription backend: {name}")
+
+
+def stitch(texts):
+    """
+    Join segment transcripts in order. Segments are back to back, not
+    overlapping, so a word repeated across a boundary was really said twice.
+    """
+    return " ".join(text.strip() for text in texts if text.strip())
+
+
+class Session:
+    def __init__(self):
+        self.futures = {}
+        self.total = None
+        self.updated = time.time()
+        self.cond = threading.Condition()
+
+
+class Transcriber:
+    def __init__(self, backend=None, max_workers=MAX_WORKERS):
+        self.backend = backend or make_backend()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcribe")
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def _session(self, session_id):
+        with self._lock:
+            now = time.time()
+            for sid in [s for s, sess in self.sessions.items() if now - sess.updated > SESSION_TTL_SECONDS]:
+                del self.sessions[sid]
+            session = self.sessions.setdefault(session_id, Session())
+            session.updated = now
+            return session
+
+    def add_chunk(self, session_id, index, audio, filename, mimetype, final=False):
+        """Start transcribing one segment; final=True marks it as the last one"""
+        session = self._session(session_id)
+        future = self.executor.submit(self.backend.transcribe, audio, filename, mimetype)
+        with session.cond:
+            session.futures[index] = future
+            if final:
+                session.total = index + 1
+            session.cond.notify_all()
+
+    def finish(self, session_id, timeout=FINAL_TIMEOUT_SECONDS):
+        """
+        Wait for every segment of the session. Returns (text, errors): the
+        stitched transcript and one message per segment that never arrived,
+        timed out or failed; the text is only complete when errors is empty.
+        """
+        session = self._session(session_id)
+        deadline = time.time() + timeout
+        with session.cond:
+            # Segments can arrive out of order; wait until all of them have been uploaded
+            while session.total is None or len(session.futures) < session.total:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                session.cond.wait(remaining)
+            indices = sorted(session.futures)
+            futures = [session.futures[i] for i in indices]
+            total = session.total
+
+        errors = []
+        if total is None:
+            errors.append("final segment never arrived")
+        else:
+            errors += [f"segment {i} never arrived" for i in range(total) if i not in indices]
+
+        _, not_done = wait(futures, timeout=max(0, deadline - time.time()))
+        texts = []
+        for index, future in zip(indices, futures):
+            if future in not_done:
+                errors.append(f"segment {index} timed out")
+                continue
+            try:
+                texts.append(future.result())
+            except Exception as e:
+                errors.append(f"segment {index} failed: {e}")
+        for error in errors:
+            print(f"Warning: Transcription {error}")
+        with self._lock:
+            self.sessions.pop(session_id, None)
+        return stitch(texts), errors